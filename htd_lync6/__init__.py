@@ -6,7 +6,7 @@ It provides the connection between the HTD Lync6 hardware and Home Assistant ent
 
 import voluptuous as vol
 from homeassistant.helpers import discovery
-from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.const import CONF_HOST, CONF_PORT, EVENT_HOMEASSISTANT_STOP
 from homeassistant.helpers.typing import ConfigType
 import logging
 
@@ -32,7 +32,7 @@ CONFIG_SCHEMA = vol.Schema(
     extra=vol.ALLOW_EXTRA,
 )
 
-def setup(hass, config: ConfigType):
+async def async_setup(hass, config: ConfigType):
     """
     Set up the HTD Lync6 integration using YAML configuration.
     This method initializes the client and prepares data for entity setup.
@@ -63,12 +63,20 @@ def setup(hass, config: ConfigType):
             "sources": sources,
         }
         _LOGGER.info("HTD Lync6 client initialized successfully.")
+
+        async def async_close_client(event):
+            """Close the persistent controller connection on shutdown."""
+            await client.close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_close_client)
     except Exception as e:
-        _LOGGER.error(f"Failed to initialize HTD Lync6 client: {e}")
+        _LOGGER.error("Failed to initialize HTD Lync6 client: %s", e)
         return False
 
     # Load platforms
     for component in ["media_player"]:
-        discovery.load_platform(hass, component, DOMAIN, {}, config)
+        hass.async_create_task(
+            discovery.async_load_platform(hass, component, DOMAIN, {}, config)
+        )
 
     return True
@@ -1,10 +1,45 @@
-import socket
+import asyncio
 import logging
-import math
+import struct
+import time
 
 MAX_HTD_VOLUME = 60
 DEFAULT_HTD_LYNC6_PORT = 10006
 
+# Entity polls landing within this window share a single query_all round-trip
+UPDATE_TTL = 1.0
+# Zone state read within this window is served from cache by query_zone
+ZONE_TTL = 0.5
+# Upper bound in seconds on the delay between attempts while the controller is unreachable
+MAX_BACKOFF = 60
+# Bound in seconds on each connect, write and read so the event loop is never held up for long
+COMMAND_TIMEOUT = 1.0
+
+# 14-byte zone status frame: zone (byte 2), state flags (byte 4), source (byte 8), volume (byte 9)
+_FRAME = struct.Struct(">2xBxB3xBB4x")
+FRAME_LENGTH = _FRAME.size
+ZONE_COUNT = 6
+
+_VALID_ZONES = frozenset(range(1, ZONE_COUNT + 1))
+_VALID_INPUTS = frozenset(range(1, 13))
+
+# Controller volume byte for each 0-100 volume percentage
+_VOLUME_CODES = bytes(
+    0x00 if v == MAX_HTD_VOLUME else 0xFF - (59 - v)
+    for v in (MAX_HTD_VOLUME * pct // 100 for pct in range(101))
+)
+
+# 5-byte command body followed by its checksum
+_COMMAND = struct.Struct("6B")
+
+def _build_command(*body):
+    return _COMMAND.pack(*body, sum(body) & 0xFF)
+
+_QUERY_ALL_COMMAND = _build_command(0x02, 0x00, 0x00, 0x05, 0x00)
+_QUERY_ZONE_COMMANDS = {
+    zone: _build_command(0x02, 0x00, zone, 0x05, 0x00) for zone in _VALID_ZONES
+}
+
 _LOGGER = logging.getLogger(__name__)
 
 class HtdLync6Client:
@@ -16,136 +51,343 @@ class HtdLync6Client:
     def __init__(self, ip_address, port=DEFAULT_HTD_LYNC6_PORT):
         self.ip_address = ip_address
         self.port = port
-        self.zones = {
-            k: {
-                "zone": k,
+        # Raw status bytes from the last frame seen for each zone, indexed by zone number
+        self._known = bytearray(ZONE_COUNT + 1)
+        self._flags = bytearray(ZONE_COUNT + 1)
+        self._source = bytearray(ZONE_COUNT + 1)
+        self._volume = bytearray(ZONE_COUNT + 1)
+        self._reader = None
+        self._writer = None
+        # One command in flight at a time, so writes and reads on the shared stream never interleave
+        self._io_lock = asyncio.Lock()
+        self._update_lock = asyncio.Lock()
+        self._last_update_ts = 0.0
+        self._zone_ts = {k: 0.0 for k in _VALID_ZONES}
+        self._failures = 0
+        self._next_try = 0.0
+
+    @property
+    def zones(self):
+        """
+        Last known state of every zone, keyed by zone number.
+        """
+        return {zone: self.zone_state(zone) for zone in _VALID_ZONES}
+
+    def zone_state(self, zone):
+        """
+        Return the last known state of a zone as a dict, or None for an invalid zone.
+        """
+        if zone not in _VALID_ZONES:
+            return None
+
+        if not self._known[zone]:
+            return {
+                "zone": zone,
                 "power": None,
                 "input": None,
                 "vol": None,
                 "mute": None,
                 "source": None,
-            } for k in range(1, 7)
+            }
+
+        flags = self._flags[zone]
+        volume = self._volume[zone]
+        return {
+            "zone": zone,
+            "power": "on" if (flags & 1 << 0) else "off",
+            "input": None,
+            "vol": volume - 196 if volume else 0,
+            "mute": "on" if (flags & 1 << 1) else "off",
+            "source": self._source[zone] + 1,
         }
 
     def parse(self, cmd, message, zone_number):
         """
         Parse the response from the controller and extract valid 14-byte zone packets only.
+        Returns the requested zone's state (True for query_all), or None if the message holds no
+        valid frame for the requested zone (any zone for query_all).
         """
-        _LOGGER.debug(f"Parsing message for zone {zone_number}: {message.hex()}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Parsing message for zone %s: %s", zone_number, message.hex())
 
         if not message or len(message) < 14:
-            _LOGGER.warning(f"Incomplete or empty message received: {message}")
-            return self.zones.get(zone_number)
+            _LOGGER.warning("Incomplete or empty message received: %s", message)
+            return None
 
-        valid_chunks = []
-        for i in range(0, len(message) - 13):
-            chunk = message[i:i+14]
-            if chunk[0] == 0x02 and chunk[1] == 0x00 and chunk[3] == 0x05:
-                valid_chunks.append(chunk)
+        mv = memoryview(message)
+        if mv[0] == 0x02 and mv[1] == 0x00 and mv[3] == 0x05:
+            # Responses are normally back-to-back 14-byte frames starting at offset 0
+            offsets = range(0, len(mv) - 13, 14)
+        else:
+            # Misaligned response, fall back to scanning every offset
+            offsets = range(0, len(mv) - 13)
 
-        if not valid_chunks:
-            _LOGGER.warning(f"No valid zone records found in message: {message}")
-            return self.zones.get(zone_number)
+        found = False
+        for i in offsets:
+            chunk = mv[i:i+14]
+            if chunk[0] == 0x02 and chunk[1] == 0x00 and chunk[3] == 0x05:
+                # zone_number inferred from chunk
+                if self.parse_message(cmd, chunk, chunk[2]):
+                    found = found or zone_number is None or chunk[2] == zone_number
 
-        for chunk in valid_chunks:
-            self.parse_message(cmd, chunk, chunk[2])  # zone_number inferred from chunk
+        if not found:
+            _LOGGER.warning(
+                "No valid record for Zone #%s found in message: %s", zone_number, message
+            )
+            return None
 
-        return self.zones if zone_number is None else self.zones.get(zone_number)
+        if zone_number is None:
+            # query_all callers read zones through zone_state(), so don't build dicts for them
+            return True
+        return self.zone_state(zone_number)
 
     def parse_message(self, cmd, message, zone_number):
         """
         Parse a 14-byte message for a specific zone.
         """
         if len(message) != 14:
-            _LOGGER.error(f"Invalid message length for Zone {zone_number}: {message}")
+            _LOGGER.error("Invalid message length for Zone %s: %s", zone_number, bytes(message))
             return False
 
-        zone = message[2]
-        if zone in range(1, 7):
-            self.zones[zone]["power"] = "on" if (message[4] & 1 << 0) else "off"
-            self.zones[zone]["source"] = message[8] + 1
-            self.zones[zone]["vol"] = message[9] - 196 if message[9] else 0
-            self.zones[zone]["mute"] = "on" if (message[4] & 1 << 1) else "off"
+        zone, flags, source, volume = _FRAME.unpack_from(message)
+        if zone in _VALID_ZONES:
+            self._known[zone] = 1
+            self._flags[zone] = flags
+            self._source[zone] = source
+            self._volume[zone] = volume
+            self._zone_ts[zone] = time.monotonic()
 
             _LOGGER.debug(
-                f"Zone #{zone} updated (requested #{zone_number}): {self.zones[zone]}"
+                "Zone #%s updated (requested #%s): flags=%s source=%s volume=%s",
+                zone, zone_number, flags, source, volume,
             )
             return True
         else:
             _LOGGER.warning(
-                f"Command for Zone #{zone_number} returned invalid Zone #{zone}: {message}"
+                "Command for Zone #%s returned invalid Zone #%s: %s",
+                zone_number, zone, bytes(message),
             )
 
         return False
 
-    def set_source(self, zone, input):
-        if zone not in range(1, 7):
-            _LOGGER.warning(f"Invalid Zone: {zone}")
+    async def set_source(self, zone, input):
+        if zone not in _VALID_ZONES:
+            _LOGGER.warning("Invalid Zone: %s", zone)
             return
-        if input not in range(1, 13):
-            _LOGGER.warning(f"Invalid Input: {input}")
+        if input not in _VALID_INPUTS:
+            _LOGGER.warning("Invalid Input: %s", input)
             return
 
         input_code = input + 15 if input < 13 else input + 86
-        cmd = bytearray([0x02, 0x00, zone, 0x04, input_code])
-        self.send_command(cmd, zone)
+        cmd = _build_command(0x02, 0x00, zone, 0x04, input_code)
+        await self.send_command(cmd, zone)
+        self._invalidate(zone)
 
-    def set_volume(self, zone, vol):
-        if vol not in range(0, 101):
-            _LOGGER.warning(f"Invalid Volume: {vol}")
+    async def set_volume(self, zone, vol):
+        if zone not in _VALID_ZONES:
+            _LOGGER.warning("Invalid Zone: %s", zone)
+            return
+        if not 0 <= vol <= 100:
+            _LOGGER.warning("Invalid Volume: %s", vol)
             return
 
-        volume_int = int(math.floor(MAX_HTD_VOLUME * vol / 100))
-        volume = 0x00 if volume_int == 60 else 0xFF - (59 - volume_int)
-        cmd = bytearray([0x02, 0x01, zone, 0x15, volume])
-        self.send_command(cmd, zone)
+        cmd = _build_command(0x02, 0x01, zone, 0x15, _VOLUME_CODES[int(vol)])
+        await self.send_command(cmd, zone)
+        self._invalidate(zone)
 
-    def toggle_mute(self, zone, mute):
-        if zone not in range(1, 7):
-            _LOGGER.warning(f"Invalid Zone: {zone}")
+    async def toggle_mute(self, zone, mute):
+        if zone not in _VALID_ZONES:
+            _LOGGER.warning("Invalid Zone: %s", zone)
             return
 
-        cmd = bytearray([0x02, 0x00, zone, 0x04, 0x1E if mute else 0x1F])
-        self.send_command(cmd, zone)
+        cmd = _build_command(0x02, 0x00, zone, 0x04, 0x1E if mute else 0x1F)
+        await self.send_command(cmd, zone)
+        self._invalidate(zone)
 
-    def query_zone(self, zone):
-        if zone not in range(1, 7):
-            _LOGGER.warning(f"Invalid Zone: {zone}")
+    async def query_zone(self, zone):
+        if zone not in _VALID_ZONES:
+            _LOGGER.warning("Invalid Zone: %s", zone)
             return None
 
-        cmd = bytearray([0x02, 0x00, zone, 0x05, 0x00])
-        return self.send_command(cmd, zone)
+        if time.monotonic() - self._zone_ts[zone] < ZONE_TTL:
+            return self.zone_state(zone)
+
+        cmd = _QUERY_ZONE_COMMANDS[zone]
+        return await self.send_command(cmd, zone)
+
+    async def query_all(self):
+        cmd = _QUERY_ALL_COMMAND
+        return await self.send_command(cmd)
+
+    async def async_update_all(self):
+        """
+        Refresh the state of every zone with a single query_all request and return whether
+        zone state is available through zone_state().
+        Calls made within UPDATE_TTL of the last successful refresh reuse the cached state.
+        """
+        async with self._update_lock:
+            if time.monotonic() - self._last_update_ts < UPDATE_TTL:
+                return True
 
-    def query_all(self):
-        cmd = bytearray([0x02, 0x00, 0x00, 0x05, 0x00])
-        return self.send_command(cmd)
+            if not await self.query_all():
+                return False
 
-    def set_power(self, zone, power):
-        if zone not in range(1, 7):
-            _LOGGER.warning(f"Invalid Zone: {zone}")
+            self._last_update_ts = time.monotonic()
+            return True
+
+    async def set_power(self, zone, power):
+        if zone not in _VALID_ZONES:
+            _LOGGER.warning("Invalid Zone: %s", zone)
             return
 
-        cmd = bytearray([0x02, 0x00, zone, 0x04, 0x57 if power else 0x58])
-        self.send_command(cmd, zone)
+        cmd = _build_command(0x02, 0x00, zone, 0x04, 0x57 if power else 0x58)
+        await self.send_command(cmd, zone)
+        self._invalidate(zone)
 
-    def send_command(self, cmd, zone=None):
-        cmd.append(self.checksum(cmd))
-        _LOGGER.debug(f"Sending command: {cmd}")
+    def _invalidate(self, zone):
+        """
+        Force the next query_zone or async_update_all call to refresh from the controller.
+        """
+        self._zone_ts[zone] = 0.0
+        self._last_update_ts = 0.0
 
-        try:
-            with socket.create_connection((self.ip_address, self.port), timeout=1) as sock:
-                sock.sendall(cmd)
-                data = sock.recv(2048)
+    async def send_command(self, cmd, zone=None):
+        # Zone commands answer with that zone's frame, query_all with one frame per zone
+        expected_len = FRAME_LENGTH if zone is not None else FRAME_LENGTH * ZONE_COUNT
+        _LOGGER.debug("Sending command: %s", cmd)
 
-            if not data:
-                _LOGGER.warning(f"No response received for command: {cmd}")
+        async with self._io_lock:
+            if time.monotonic() < self._next_try:
+                if cmd[3] == 0x05:
+                    _LOGGER.debug("Controller unreachable, skipping query: %s", cmd)
+                else:
+                    # A user-initiated change is being dropped, make sure it shows up in the log
+                    _LOGGER.warning(
+                        "HTD controller unreachable, command for zone %s not sent: %s", zone, cmd
+                    )
                 return None
 
-            _LOGGER.debug(f"Response received: {data}")
-            return self.parse(cmd, data, zone)
-        except (socket.timeout, ConnectionError) as e:
-            _LOGGER.error(f"Failed to communicate with HTD controller: {e}")
-            return None
+            # Unsolicited data would be read as this command's reply, so start over on a fresh stream
+            if self._writer is not None and await self._has_stale_data():
+                await self._close_connection()
+
+            # A pooled connection the controller has already dropped still looks open until it is
+            # used, so an error on a reused connection is retried once on a fresh one
+            reused = self._writer is not None and not self._writer.is_closing()
+            try:
+                data = await self._exchange(cmd, expected_len)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, OSError) as e:
+                if not reused:
+                    await self._handle_failure(cmd, e)
+                    return None
 
-    def checksum(self, message):
-        return sum(message) & 0xFF
+                _LOGGER.debug("Pooled connection failed, reconnecting: %r", e)
+                await self._close_connection()
+                try:
+                    data = await self._exchange(cmd, expected_len)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, OSError) as e:
+                    await self._handle_failure(cmd, e)
+                    return None
+
+            self._failures = 0
+            self._next_try = 0.0
+
+            _LOGGER.debug("Response received: %s", data)
+            result = self.parse(cmd, data, zone)
+            if result is None:
+                # The stream is probably out of step with its replies, so the next command
+                # starts on a fresh connection
+                await self._close_connection()
+            return result
+
+    async def _exchange(self, cmd, expected_len):
+        """
+        Send a command on the pooled connection, opening it if needed, and read the reply.
+        Any failure or cancellation part-way through drops the connection, since the reply may
+        still arrive later and would shift every response read after it.
+        """
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip_address, self.port),
+                timeout=COMMAND_TIMEOUT,
+            )
+
+        reader, writer = self._reader, self._writer
+        completed = False
+        try:
+            writer.write(cmd)
+            await asyncio.wait_for(writer.drain(), timeout=COMMAND_TIMEOUT)
+            data = await asyncio.wait_for(
+                reader.readexactly(expected_len), timeout=COMMAND_TIMEOUT
+            )
+            completed = True
+        finally:
+            if not completed and self._writer is writer:
+                writer.close()
+                self._reader = None
+                self._writer = None
+
+        return data
+
+    async def _has_stale_data(self):
+        """
+        Whether the pooled stream has reached EOF or holds bytes no command asked for.
+        The zero deadline only picks up data already received and never waits on the network.
+        """
+        if self._reader.at_eof():
+            return True
+
+        try:
+            async with asyncio.timeout(0):
+                stale = await self._reader.read(FRAME_LENGTH * ZONE_COUNT)
+        except asyncio.TimeoutError:
+            return False
+        except OSError as e:
+            _LOGGER.debug("Pooled connection failed while idle: %r", e)
+            return True
+
+        _LOGGER.debug("Unexpected data from controller: %s", stale)
+        return True
+
+    async def close(self):
+        """
+        Close the persistent connection to the controller, if one is open.
+        """
+        async with self._io_lock:
+            await self._close_connection()
+
+    @property
+    def available(self):
+        """
+        Whether the last command reached the controller.
+        """
+        return self._failures == 0
+
+    async def _handle_failure(self, cmd, error):
+        """
+        Log a failed command, drop the connection and back off exponentially before the next attempt.
+        """
+        if isinstance(error, asyncio.IncompleteReadError):
+            # The controller closed its end of the socket mid-response
+            _LOGGER.warning(
+                "Incomplete response received for command %s: %s", cmd, error.partial
+            )
+        else:
+            _LOGGER.error("Failed to communicate with HTD controller: %s", error)
+
+        self._failures += 1
+        self._next_try = time.monotonic() + min(MAX_BACKOFF, 2 ** self._failures)
+        await self._close_connection()
+
+    async def _close_connection(self):
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        if writer is None:
+            return
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
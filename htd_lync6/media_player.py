@@ -29,11 +29,11 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     zones = htd_data["zones"]
     sources = htd_data["sources"]
 
-    _LOGGER.debug(f"Setting up media player entities: zones={zones}, sources={sources}")
+    _LOGGER.debug("Setting up media player entities: zones=%s, sources=%s", zones, sources)
 
     entities = []
     for i, zone_name in enumerate(zones, start=1):
-        _LOGGER.debug(f"Creating media player entity for zone: {zone_name} (Zone {i})")
+        _LOGGER.debug("Creating media player entity for zone: %s (Zone %s)", zone_name, i)
         entities.append(HtdLync6MediaPlayer(client, i, zone_name, sources))
 
     async_add_entities(entities, update_before_add=True)
@@ -49,11 +49,15 @@ class HtdLync6MediaPlayer(MediaPlayerEntity):
         self._zone = zone
         self._zone_name = zone_name
         self._sources = sources
+        self._source_index = {}
+        for i, name in enumerate(sources, start=1):
+            # The first source wins when names repeat, as list.index() did
+            self._source_index.setdefault(name, i)
+        self._source_names = dict(enumerate(sources, start=1))
         self._state = STATE_UNKNOWN
         self._volume = 0
         self._is_muted = False
         self._source = None
-        self.update()
 
     @property
     def supported_features(self):
@@ -67,29 +71,29 @@ class HtdLync6MediaPlayer(MediaPlayerEntity):
     def state(self):
         return self._state
 
-    def turn_on(self):
-        self._client.set_power(self._zone, 1)
-        self.update()
+    async def async_turn_on(self):
+        await self._client.set_power(self._zone, 1)
+        await self.async_update()
 
-    def turn_off(self):
-        self._client.set_power(self._zone, 0)
-        self.update()
+    async def async_turn_off(self):
+        await self._client.set_power(self._zone, 0)
+        await self.async_update()
 
     @property
     def volume_level(self):
         return self._volume / 100
 
-    def set_volume_level(self, volume):
-        self._client.set_volume(self._zone, int(volume * 100))
-        self.update()
+    async def async_set_volume_level(self, volume):
+        await self._client.set_volume(self._zone, int(volume * 100))
+        await self.async_update()
 
     @property
     def is_volume_muted(self):
         return self._is_muted
 
-    def mute_volume(self, mute):
-        self._client.toggle_mute(self._zone, mute)
-        self.update()
+    async def async_mute_volume(self, mute):
+        await self._client.toggle_mute(self._zone, mute)
+        await self.async_update()
 
     @property
     def source(self):
@@ -99,30 +103,32 @@ class HtdLync6MediaPlayer(MediaPlayerEntity):
     def source_list(self):
         return self._sources
 
-    def select_source(self, source):
-        if source in self._sources:
-            source_index = self._sources.index(source) + 1
-            self._client.set_source(self._zone, source_index)
-            self.update()
-        else:
-            _LOGGER.warning(f"Source '{source}' not available in zone {self._zone}.")
-
-    def update(self):
-        try:
-            zone_info = self._client.query_zone(self._zone)
-            if not zone_info:
-                _LOGGER.warning(f"No data received for zone {self._zone}")
-                return
-
-            self._state = STATE_ON if zone_info["power"] == "on" else STATE_OFF
-            self._volume = zone_info["vol"]
-            self._is_muted = zone_info["mute"] == "on"
-            self._source = (
-                self._sources[zone_info["source"] - 1]
-                if zone_info["source"] and 0 < zone_info["source"] <= len(self._sources)
-                else None
-            )
-            _LOGGER.debug(f"Zone {self._zone} updated: {zone_info}")
-
-        except Exception as e:
-            _LOGGER.error(f"Failed to update zone {self._zone}: {e}")
+    async def async_select_source(self, source):
+        source_index = self._source_index.get(source)
+        if source_index is None:
+            _LOGGER.warning("Source '%s' not available in zone %s.", source, self._zone)
+            return
+
+        await self._client.set_source(self._zone, source_index)
+        await self.async_update()
+
+    @property
+    def available(self):
+        return self._client.available
+
+    async def async_update(self):
+        if not await self._client.async_update_all():
+            _LOGGER.warning("No data received for zone %s", self._zone)
+            return
+
+        zone_info = self._client.zone_state(self._zone)
+        if zone_info["power"] is None:
+            # The refresh succeeded but carried no frame for this zone yet
+            _LOGGER.warning("No data received for zone %s", self._zone)
+            return
+
+        self._state = STATE_ON if zone_info["power"] == "on" else STATE_OFF
+        self._volume = zone_info["vol"]
+        self._is_muted = zone_info["mute"] == "on"
+        self._source = self._source_names.get(zone_info["source"])
+        _LOGGER.debug("Zone %s updated: %s", self._zone, zone_info)